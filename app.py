@@ -9,21 +9,45 @@ app.py
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
+import re
 import uuid
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from operator import attrgetter
 
 from tksheet import Sheet
-from PIL import ImageGrab
 
-from image_viewer import ImageViewerWindow
 from file_handler import FileHandler
-from wiki_exporter import WikiExporter
 from utils import Utils
-from dependencies import TKSHEET_AVAILABLE, PIL_AVAILABLE, check_dependencies, check_pillow_availability
+from dependencies import TKSHEET_AVAILABLE, PIL_AVAILABLE, check_dependencies
+
+# 支持的图片文件扩展名（忽略大小写），用于过滤剪贴板中的文件列表
+_IMG_RE = re.compile(r"\.(?:png|jpe?g|gif|bmp|tiff)\Z", re.IGNORECASE)
 
 class SpreadsheetApp:
     """主应用程序类，负责UI的构建和核心功能的协调。"""
 
+    # 工具栏按钮定义：(按钮文字, 回调属性路径)，None 表示分隔符。
+    # 回调在点击时才通过属性路径解析，因此 file_handler/wiki_exporter 可以晚于按钮创建。
+    TOOLBAR_SPEC = (
+        # 文件操作按钮
+        ("打开Excel", "file_handler.open_excel_file"),
+        ("保存Excel", "file_handler.save_excel_file"),
+        None,
+        # 包导入导出按钮
+        ("导入完整包", "file_handler.import_package"),
+        ("导出完整包", "export_package"),
+        None,
+        # 图片操作按钮
+        ("粘贴图片", "paste_image"),
+        ("上传图片", "upload_image"),
+        None,
+        # Wiki导出按钮
+        ("导出Wiki", "wiki_exporter.export_to_wiki"),
+        ("复制Wiki到剪贴板", "copy_wiki_to_clipboard"),
+    )
+
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("表格管理软件")
@@ -32,8 +56,17 @@ class SpreadsheetApp:
         # 数据存储
         self.assets_dir = "assets"
         # 确保assets目录存在，用于存放图片等资源
-        if not os.path.exists(self.assets_dir):
-            os.makedirs(self.assets_dir)
+        os.makedirs(self.assets_dir, exist_ok=True)
+
+        # 待执行的行高调整任务（after句柄），用于合并连续的单元格修改事件
+        self._adjust_pending = None
+        # 列标题刷新是否已安排在空闲时执行，用于合并连续的插入删除操作
+        self._idx_pending = False
+        # 内容已修改但尚未调整行高的行（不在可视区域内），滚动到可见时再调整
+        self._dirty_rows = set()
+
+        # 后台IO线程池，用于图片编码写盘等耗时操作，避免阻塞UI线程
+        self._io_pool = ThreadPoolExecutor(max_workers=2)
         
         # 检查依赖，如果缺少必要依赖则退出应用程序
         if not check_dependencies():
@@ -42,10 +75,14 @@ class SpreadsheetApp:
         
         # 关键：为了解决UI布局问题，需要确保UI组件的创建顺序符合预期。
         # 工具栏应该在表格和状态栏之前创建，这样它们才能正确地pack到顶部。
-        # 同时，file_handler和wiki_exporter必须在populate_toolbar之前初始化。
+        # 工具栏按钮的回调在点击时才解析，因此可以在file_handler初始化之前一次性创建。
 
-        # 1. 先创建工具栏框架，并将其pack到顶部
-        self.create_toolbar_frame()
+        # 工具栏按钮共用同一样式，Tk只需为其编译一次布局
+        self._style = ttk.Style(self.root)
+        self._style.configure("Tool.TButton", padding=(4, 2))
+
+        # 1. 先创建工具栏（框架和按钮），并将其pack到顶部
+        self.create_toolbar()
         
         # 2. 创建表格和状态栏，它们将pack在工具栏框架下方
         self.create_table()
@@ -53,47 +90,50 @@ class SpreadsheetApp:
 
         # 3. 初始化功能模块实例，并将必要的依赖（如sheet、assets_dir、status_var）传递给它们
         # 这些模块的初始化依赖于self.sheet和self.status_var，所以必须在它们创建之后
+        # wiki_exporter 较少使用，延迟到首次访问时再导入并创建（见 wiki_exporter 属性）
         self.file_handler = FileHandler(self.sheet, self.assets_dir, self.status_var)
-        self.wiki_exporter = WikiExporter(self.sheet, self.status_var)
-
-        # 4. 填充工具栏按钮，现在file_handler和wiki_exporter已经初始化，可以安全地创建按钮
-        self.populate_toolbar()
+        self._wiki_exporter = None
         
-        # 5. 初始化数据，例如设置默认行高
+        # 4. 初始化数据，例如设置默认行高
         self.init_data()
 
-    def create_toolbar_frame(self):
-        """只创建工具栏框架，不包含按钮。"""
+        # 5. 预先构建右键菜单
+        self._build_menus()
+
+    @property
+    def wiki_exporter(self):
+        """WikiExporter 实例，首次访问时才导入模块并创建，以减少启动开销。"""
+        if self._wiki_exporter is None:
+            from wiki_exporter import WikiExporter
+            self._wiki_exporter = WikiExporter(self.sheet, self.status_var)
+        return self._wiki_exporter
+
+    def create_toolbar(self):
+        """创建工具栏框架，并按 TOOLBAR_SPEC 一次性填充按钮和分隔符。"""
         self.toolbar = ttk.Frame(self.root)
         self.toolbar.pack(fill="x", padx=5, pady=2)
 
-    def populate_toolbar(self):
-        """填充工具栏按钮。"""
-        # 文件操作按钮
-        ttk.Button(self.toolbar, text="打开Excel", command=self.file_handler.open_excel_file).pack(side="left", padx=2)
-        ttk.Button(self.toolbar, text="保存Excel", command=self.file_handler.save_excel_file).pack(side="left", padx=2)
-        ttk.Separator(self.toolbar, orient="vertical").pack(side="left", fill="y", padx=5)
-        
-        # 包导入导出按钮
-        ttk.Button(self.toolbar, text="导入完整包", command=self.file_handler.import_package).pack(side="left", padx=2)
-        # 导出完整包时，需要将wiki_exporter实例传递给file_handler，以便file_handler可以调用wiki_exporter的同步导出方法
-        ttk.Button(self.toolbar, text="导出完整包", command=lambda: self.file_handler.export_package(self.wiki_exporter)).pack(side="left", padx=2)
-        ttk.Separator(self.toolbar, orient="vertical").pack(side="left", fill="y", padx=5)
-        
-        # 图片操作按钮
-        if check_pillow_availability(): # 只有当Pillow可用时才显示粘贴图片按钮
-            ttk.Button(self.toolbar, text="粘贴图片", command=self.paste_image).pack(side="left", padx=2)
-        ttk.Button(self.toolbar, text="上传图片", command=self.upload_image).pack(side="left", padx=2)
-        ttk.Separator(self.toolbar, orient="vertical").pack(side="left", fill="y", padx=5)
-        
-        # Wiki导出按钮
-        ttk.Button(self.toolbar, text="导出Wiki", command=self.wiki_exporter.export_to_wiki).pack(side="left", padx=2)
-        ttk.Button(self.toolbar, text="复制Wiki到剪贴板", command=self.copy_wiki_to_clipboard).pack(side="left", padx=2)
+        self._buttons = []
+        for item in self.TOOLBAR_SPEC:
+            if item is None:
+                ttk.Separator(self.toolbar, orient="vertical").pack(side="left", fill="y", padx=5)
+                continue
+            text, path = item
+            if path == "paste_image" and not PIL_AVAILABLE: # 只有当Pillow可用时才显示粘贴图片按钮
+                continue
+            button = ttk.Button(self.toolbar, text=text, style="Tool.TButton",
+                                command=lambda getter=attrgetter(path): getter(self)())
+            button.pack(side="left", padx=2)
+            self._buttons.append(button)
         
         # 显示Pillow库是否可用的状态提示
-        if not check_pillow_availability():
+        if not PIL_AVAILABLE:
             status_label = ttk.Label(self.toolbar, text="(Pillow未安装，剪贴板功能不可用)", foreground="orange")
             status_label.pack(side="right", padx=10)
+
+    def export_package(self):
+        """导出完整包。需要将wiki_exporter实例传递给file_handler，以便调用wiki_exporter的同步导出方法。"""
+        self.file_handler.export_package(self.wiki_exporter)
     
     def create_table(self):
         """创建tksheet表格组件。"""
@@ -101,19 +141,23 @@ class SpreadsheetApp:
         # 表格框架应该在工具栏下方，并填充剩余空间
         table_frame.pack(fill="both", expand=True, padx=5, pady=5)
         
+        initial_rows = 100
         initial_columns = 20
         # 生成Excel风格的列标题 (A, B, C, ...)
         column_headers = Utils.generate_column_headers(initial_columns)
-        
+
         # 初始化tksheet表格
         self.sheet = Sheet(
             table_frame,
-            data=[[""] * initial_columns for _ in range(100)], # 初始100行20列的空数据
+            data=[], # 空数据，尺寸由下方的 total_rows/total_columns 交给tksheet分配
             headers=column_headers,
-            row_index=None, # 不使用自定义行索引，让tksheet自动管理
+            row_index=None, # 不使用自定义行索引，让tksheet自动编号（插入删除行后无需手动刷新）
             width=1150,
             height=600
         )
+        # 初始100行20列的空表格
+        self.sheet.total_rows(initial_rows)
+        self.sheet.total_columns(initial_columns)
         
         # 配置tksheet的绑定事件，启用各种交互功能
         self.sheet.enable_bindings([
@@ -125,6 +169,7 @@ class SpreadsheetApp:
         
         # 绑定自定义事件处理函数
         self.sheet.bind("<<SheetModified>>", self.on_cell_modified) # 单元格内容修改事件
+        self.sheet.bind("<<SheetRedrawn>>", self.on_sheet_redrawn) # 表格重绘事件（滚动等）
         self.sheet.bind("<Double-Button-1>", self.on_double_click) # 双击事件
         self.sheet.bind("<Button-3>", self.on_right_click) # 右键点击事件
         self.sheet.bind("<Control-MouseWheel>", self.on_ctrl_scroll) # Ctrl+滚轮事件
@@ -141,25 +186,91 @@ class SpreadsheetApp:
     
     def init_data(self):
         """初始化数据，设置默认行高。"""
-        # 设置默认行高以支持多行文本显示
-        for row in range(self.sheet.get_total_rows()):
-            self.sheet.row_height(row=row, height=25)
-    
-    def update_row_index(self):
-        """更新行号索引。"""
-        total_rows = self.sheet.get_total_rows()
-        row_index = [str(i+1) for i in range(total_rows)]
-        self.sheet.row_index(row_index)
+        # 设置默认行高以支持多行文本显示（一次性批量设置，只触发一次重绘）
+        self.sheet.set_row_heights([25] * self.sheet.get_total_rows())
+        self.sheet.redraw()
     
     def update_column_headers(self):
-        """更新列标题。"""
-        total_columns = self.sheet.get_total_columns()
-        column_headers = Utils.generate_column_headers(total_columns)
+        """更新列标题。表格当前的标题已经正确时跳过，避免tksheet重复重绘。"""
+        # 与表格实际的标题比较，而不是缓存列数：删除列后列数可能不变但标题已错位，
+        # 打开文件等其他地方设置标题后也不会出现过期的缓存
+        column_headers = Utils.generate_column_headers(self.sheet.get_total_columns())
+        if self.sheet.headers() == column_headers:
+            return
         self.sheet.headers(column_headers)
     
+    def _schedule_index_refresh(self):
+        """安排在空闲时刷新列标题，同一轮事件循环内的多次结构修改只刷新一次。"""
+        if not self._idx_pending:
+            self._idx_pending = True
+            self.root.after_idle(self._flush_index_refresh)
+
+    def _flush_index_refresh(self):
+        """执行被安排的列标题刷新。"""
+        self._idx_pending = False
+        self.update_column_headers()
+    
     def on_cell_modified(self, event):
-        """单元格修改事件处理，自动调整行高。"""
-        Utils.auto_adjust_row_heights(self.sheet)
+        """
+        单元格修改事件处理：把被修改的行标记为待调整，延迟50ms后自动调整行高，连续修改只触发一次调整。
+        插入或删除行时先移动已标记行的行号；无法确定受影响的行时（撤销、移动行、增删列等）标记所有行。
+        """
+        edited_rows = {row for row, _ in event.cells.table}
+        # added.rows 按类别分组（"table"、"index"、"row_heights"），新行的行号是 "table" 中的键；
+        # deleted.rows 的键直接是被删除行的行号
+        added_rows = tuple(event.added.rows.get("table", ()))
+        deleted_rows = tuple(event.deleted.rows)
+        if (event.eventname in ("undo", "redo") or event.moved.rows or event.added.columns
+                or event.deleted.columns or not (edited_rows or added_rows or deleted_rows)):
+            self._dirty_rows = set(range(self.sheet.get_total_rows()))
+        else:
+            self._shift_dirty_rows(added=added_rows, deleted=deleted_rows)
+            self._dirty_rows.update(edited_rows, added_rows)
+        if self._adjust_pending:
+            self.root.after_cancel(self._adjust_pending)
+        self._adjust_pending = self.root.after(50, self._do_adjust_row_heights)
+
+    def _shift_dirty_rows(self, added=(), deleted=()):
+        """
+        插入或删除行后，把待调整行的行号移动到新位置，被删除的行不再保留。
+
+        Args:
+            added (iterable): 插入后新行的行号。
+            deleted (iterable): 删除前被删除行的行号。
+        """
+        if deleted:
+            deleted = sorted(deleted)
+            self._dirty_rows = {
+                row - bisect_left(deleted, row) for row in self._dirty_rows
+                if row not in deleted
+            }
+        if added:
+            added = sorted(added)
+            shifted = set()
+            for row in self._dirty_rows:
+                for idx in added:
+                    if idx > row:
+                        break
+                    row += 1
+                shifted.add(row)
+            self._dirty_rows = shifted
+
+    def _do_adjust_row_heights(self):
+        """执行被延迟的行高调整，只处理可视区域内的待调整行，其余行在滚动到可见时再调整。"""
+        self._adjust_pending = None
+        self._adjust_visible_dirty_rows()
+
+    def _adjust_visible_dirty_rows(self):
+        """调整当前可见且待调整的行的行高。"""
+        visible_rows = self._dirty_rows.intersection(range(*self.sheet.visible_rows))
+        if visible_rows:
+            self._dirty_rows -= visible_rows
+            Utils.auto_adjust_row_heights(self.sheet, rows=sorted(visible_rows))
+
+    def on_sheet_redrawn(self, event):
+        """表格重绘事件处理，滚动后对新进入可视区域的待调整行补做行高调整。"""
+        if self._dirty_rows:
+            self._adjust_visible_dirty_rows()
     
     def on_double_click(self, event):
         """双击单元格事件处理，用于查看图片。"""
@@ -172,8 +283,48 @@ class SpreadsheetApp:
         
         # 从单元格内容中提取图片路径，并打开图片查看器
         image_paths = Utils.extract_image_paths(cell_value)
-        if image_paths:
-            ImageViewerWindow(self.root, image_paths)
+        if not image_paths:
+            return
+        if PIL_AVAILABLE:
+            # 在后台线程中预先解码默认显示的第一张图片，完成后回到UI线程打开查看器，避免解码大图时界面卡顿；
+            # 其余图片由查看器在选中时按需加载，不必等所有图片解码完才显示，也不会同时占用所有图片的内存
+            screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+            future = self._io_pool.submit(self._preload_images, image_paths[:1], screen_size)
+            future.add_done_callback(
+                lambda f: self.root.after(0, self._open_image_viewer, image_paths, f)
+            )
+            self.status_var.set("正在加载图片...")
+        else:
+            self._open_image_viewer(image_paths)
+
+    @staticmethod
+    def _preload_images(image_paths, max_size):
+        """
+        在后台线程中打开并解码图片（PhotoImage 仍需在UI线程中创建）。
+
+        Args:
+            image_paths (list): 图片文件路径列表。
+            max_size (tuple): 查看器显示区域的最大尺寸 (宽, 高)，大图只需解码到适应该尺寸的精度。
+
+        Returns:
+            dict: 图片路径到 (PIL Image, 原始尺寸) 的映射，无法加载的图片不包含在内。
+        """
+        from image_viewer import ImageViewerWindow
+        images = {}
+        for path in image_paths:
+            try:
+                images[path] = ImageViewerWindow.decode_image(path, max_size)
+            except Exception:
+                pass # 无法加载的图片交给查看器显示错误信息
+        return images
+
+    def _open_image_viewer(self, image_paths, future=None):
+        """打开图片查看器窗口，future 为预加载任务时使用其解码结果。"""
+        from image_viewer import ImageViewerWindow
+        preloaded_images = None
+        if future is not None and future.exception() is None:
+            preloaded_images = future.result()
+        ImageViewerWindow(self.root, image_paths, preloaded_images, executor=self._io_pool)
     
     def on_ctrl_scroll(self, event):
         """Ctrl+滚轮事件处理，批量调整所有行高和所有列宽。"""
@@ -183,87 +334,66 @@ class SpreadsheetApp:
             else:
                 scale_factor = 0.9 # 缩小
 
-            # 批量调整所有行高
-            for row in range(self.sheet.get_total_rows()):
-                try:
-                    current_height = self.sheet.row_height(row=row)
-                    if not isinstance(current_height, int):
-                        current_height = 25 # 默认值
-                except Exception:
-                    current_height = 25
-                new_height = int(max(21, min(200, current_height * scale_factor)))
-                self.sheet.row_height(row=row, height=new_height)
-
-            # 批量调整所有列宽
-            for col in range(self.sheet.get_total_columns()):
-                try:
-                    current_width = self.sheet.column_width(column=col)
-                    if not isinstance(current_width, int):
-                        current_width = 100 # 默认值
-                except Exception:
-                    current_width = 100
-                new_width = int(max(30, min(500, current_width * scale_factor)))
-                self.sheet.column_width(column=col, width=new_width)
+            # 一次性读取所有行高和列宽，计算后批量写回，避免逐行逐列调用tksheet
+            heights = [int(max(21, min(200, h * scale_factor))) for h in self.sheet.get_row_heights()]
+            widths = [int(max(30, min(500, w * scale_factor))) for w in self.sheet.get_column_widths()]
+            self.sheet.set_row_heights(heights)
+            self.sheet.set_column_widths(widths)
+            self.sheet.redraw()
 
             self.status_var.set(f"所有行高和列宽已同步调整")
         except Exception as e:
             print(f"Ctrl+滚轮调整错误: {e}")
     
     def get_selection_type(self):
-        """获取当前选择类型（行、列或单元格）。"""
-        try:
-            selected_rows = self.sheet.get_selected_rows(return_tuple=True)
-            selected_columns = self.sheet.get_selected_columns(return_tuple=True)
-            
-            # 判断是否选中整行
-            if selected_rows and len(selected_rows) > 0:
-                if not selected_columns or len(selected_columns) == 0: # 如果有行选择但没有列选择，则认为是整行选择
-                    return "row"
-            
-            # 判断是否选中整列
-            if selected_columns and len(selected_columns) > 0:
-                if not selected_rows or len(selected_rows) == 0: # 如果有列选择但没有行选择，则认为是整列选择
-                    return "column"
-            
-            return "cell" # 否则是单元格选择
-            
-        except Exception as e:
-            print(f"获取选择类型错误: {e}")
+        """获取当前选择类型（行、列或单元格），直接读取tksheet当前选择框的类型。"""
+        selected = self.sheet.selected
+        if not selected:
             return "cell"
+        return {"rows": "row", "columns": "column"}.get(selected.type_, "cell")
     
+    def _build_menus(self):
+        """预先创建行、列、单元格三种右键菜单，右键时直接弹出而不是每次重新构建。"""
+        # 整行选择时的菜单
+        self._row_menu = tk.Menu(self.root, tearoff=0,
+                                 postcommand=lambda: self.status_var.set("选中整行 - 显示行操作菜单"))
+        self._row_menu.add_command(label="在上方插入行", command=self.insert_row_above)
+        self._row_menu.add_command(label="在下方插入行", command=self.insert_row_below)
+        self._row_menu.add_command(label="删除行", command=self.delete_row)
+
+        # 整列选择时的菜单
+        self._col_menu = tk.Menu(self.root, tearoff=0,
+                                 postcommand=lambda: self.status_var.set("选中整列 - 显示列操作菜单"))
+        self._col_menu.add_command(label="在左侧插入列", command=self.insert_column_left)
+        self._col_menu.add_command(label="在右侧插入列", command=self.insert_column_right)
+        self._col_menu.add_command(label="删除列", command=self.delete_column)
+
+        # 单元格选择时显示所有操作
+        self._cell_menu = tk.Menu(self.root, tearoff=0,
+                                  postcommand=lambda: self.status_var.set("选中单元格 - 显示完整菜单"))
+        self._cell_menu.add_command(label="在上方插入行", command=self.insert_row_above)
+        self._cell_menu.add_command(label="在下方插入行", command=self.insert_row_below)
+        self._cell_menu.add_command(label="删除行", command=self.delete_row)
+        self._cell_menu.add_separator()
+
+        self._cell_menu.add_command(label="在左侧插入列", command=self.insert_column_left)
+        self._cell_menu.add_command(label="在右侧插入列", command=self.insert_column_right)
+        self._cell_menu.add_command(label="删除列", command=self.delete_column)
+        self._cell_menu.add_separator()
+
+        if PIL_AVAILABLE:
+            self._cell_menu.add_command(label="粘贴图片", command=self.paste_image)
+        self._cell_menu.add_command(label="上传图片", command=self.upload_image)
+
     def on_right_click(self, event):
-        """右键菜单事件处理，根据选择类型显示不同的上下文菜单。"""
+        """右键菜单事件处理，根据选择类型弹出对应的上下文菜单。"""
         selection_type = self.get_selection_type()
-        
-        context_menu = tk.Menu(self.root, tearoff=0)
-        
-        # 根据选择类型添加菜单项
         if selection_type == "row":
-            context_menu.add_command(label="在上方插入行", command=self.insert_row_above)
-            context_menu.add_command(label="在下方插入行", command=self.insert_row_below)
-            context_menu.add_command(label="删除行", command=self.delete_row)
-            self.status_var.set("选中整行 - 显示行操作菜单")
+            context_menu = self._row_menu
         elif selection_type == "column":
-            context_menu.add_command(label="在左侧插入列", command=self.insert_column_left)
-            context_menu.add_command(label="在右侧插入列", command=self.insert_column_right)
-            context_menu.add_command(label="删除列", command=self.delete_column)
-            self.status_var.set("选中整列 - 显示列操作菜单")
+            context_menu = self._col_menu
         else:
-            # 单元格选择时显示所有操作
-            context_menu.add_command(label="在上方插入行", command=self.insert_row_above)
-            context_menu.add_command(label="在下方插入行", command=self.insert_row_below)
-            context_menu.add_command(label="删除行", command=self.delete_row)
-            context_menu.add_separator()
-            
-            context_menu.add_command(label="在左侧插入列", command=self.insert_column_left)
-            context_menu.add_command(label="在右侧插入列", command=self.insert_column_right)
-            context_menu.add_command(label="删除列", command=self.delete_column)
-            context_menu.add_separator()
-            
-            if check_pillow_availability():
-                context_menu.add_command(label="粘贴图片", command=self.paste_image)
-            context_menu.add_command(label="上传图片", command=self.upload_image)
-            self.status_var.set("选中单元格 - 显示完整菜单")
+            context_menu = self._cell_menu
         
         # 显示右键菜单
         try:
@@ -273,7 +403,7 @@ class SpreadsheetApp:
     
     def paste_image(self):
         """粘贴图片到当前选中单元格。"""
-        if not check_pillow_availability():
+        if not PIL_AVAILABLE:
             messagebox.showerror("错误", "需要安装Pillow库来支持剪贴板图片功能\n请运行: pip install Pillow")
             return
         
@@ -283,6 +413,7 @@ class SpreadsheetApp:
             return
         
         try:
+            from PIL import ImageGrab
             clipboard_data = ImageGrab.grabclipboard()
             
             if clipboard_data is None:
@@ -291,23 +422,41 @@ class SpreadsheetApp:
             new_image_paths = []
             
             if isinstance(clipboard_data, list): # 如果剪贴板内容是文件路径列表
-                image_files = [f for f in clipboard_data if f.lower().endswith((".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff"))]
+                image_files = [f for f in clipboard_data if _IMG_RE.search(f)]
                 if image_files:
                     new_image_paths = Utils.copy_images_to_assets(image_files, self.assets_dir)
             else: # 如果剪贴板内容是PIL Image对象
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 filename = f"clipboard_{timestamp}_{uuid.uuid4().hex[:8]}.png"
                 filepath = os.path.join(self.assets_dir, filename)
-                clipboard_data.save(filepath)
-                new_image_paths = [os.path.relpath(filepath, start=os.getcwd())]
+                # PNG编码在后台线程中进行（低压缩级别），完成后回到UI线程更新单元格
+                future = self._io_pool.submit(clipboard_data.save, filepath, "PNG", optimize=False, compress_level=1)
+                future.add_done_callback(
+                    lambda f: self.root.after(0, self._on_paste_saved, f, filepath, selected)
+                )
+                self.status_var.set("正在保存剪贴板图片...")
+                return
             
-            if new_image_paths:
-                # 增量添加图片路径到单元格内容
-                Utils.add_images_to_cell_incremental(self.sheet, selected.row, selected.column, new_image_paths, self.assets_dir)
-                self.status_var.set(f"已粘贴 {len(new_image_paths)} 张图片到单元格 ({selected.row+1}, {Utils.generate_column_headers(selected.column+1)[selected.column]})")
+            self._add_pasted_images(selected, new_image_paths)
             
         except Exception as e:
             messagebox.showerror("错误", f"粘贴图片失败: {str(e)}")
+
+    def _on_paste_saved(self, future, filepath, selected):
+        """剪贴板图片在后台保存完成后的回调（在UI线程中执行）。"""
+        error = future.exception()
+        if error:
+            messagebox.showerror("错误", f"粘贴图片失败: {str(error)}")
+            return
+        # assets_dir 本身就是相对路径，拼接结果即为相对路径，无需再调用 relpath
+        self._add_pasted_images(selected, [filepath])
+
+    def _add_pasted_images(self, selected, new_image_paths):
+        """将粘贴得到的图片路径增量添加到单元格，并更新状态栏。"""
+        if new_image_paths:
+            # 增量添加图片路径到单元格内容
+            Utils.add_images_to_cell_incremental(self.sheet, selected.row, selected.column, new_image_paths, self.assets_dir)
+            self.status_var.set(f"已粘贴 {len(new_image_paths)} 张图片到单元格 ({selected.row+1}, {Utils.column_label(selected.column)})")
     
     def upload_image(self):
         """上传图片到当前选中单元格。"""
@@ -331,31 +480,52 @@ class SpreadsheetApp:
             if new_image_paths:
                 # 增量添加图片路径到单元格内容
                 Utils.add_images_to_cell_incremental(self.sheet, selected.row, selected.column, new_image_paths, self.assets_dir)
-                self.status_var.set(f"已上传 {len(new_image_paths)} 张图片到单元格 ({selected.row+1}, {Utils.generate_column_headers(selected.column+1)[selected.column]})")
+                self.status_var.set(f"已上传 {len(new_image_paths)} 张图片到单元格 ({selected.row+1}, {Utils.column_label(selected.column)})")
     
-    def insert_row_above(self):
-        """在选中行上方插入行。"""
+    def _insert_row(self, offset):
+        """
+        在选中行的上方(offset=0)或下方(offset=1)插入一行；未选中时插入到顶部或底部。
+
+        Args:
+            offset (int): 相对于选中行的偏移，0 表示上方，1 表示下方。
+        """
         selected = self.sheet.get_currently_selected()
+        side = "下方" if offset else "上方"
         if selected:
-            self.sheet.insert_rows(rows=1, idx=selected.row)
-            self.update_row_index()
-            self.status_var.set(f"已在第 {selected.row+1} 行上方插入新行")
+            self.sheet.insert_rows(rows=1, idx=selected.row + offset)
+            self._shift_dirty_rows(added=[selected.row + offset])
+            self.status_var.set(f"已在第 {selected.row+1} 行{side}插入新行")
         else:
-            self.sheet.insert_rows(rows=1, idx=0)
-            self.update_row_index()
-            self.status_var.set("已在顶部插入新行")
-    
-    def insert_row_below(self):
-        """在选中行下方插入行。"""
+            self.sheet.insert_rows(rows=1, idx=None if offset else 0)
+            if not offset:
+                self._shift_dirty_rows(added=[0])
+            self.status_var.set(f"已在{'底部' if offset else '顶部'}插入新行")
+
+    def _insert_column(self, offset):
+        """
+        在选中列的左侧(offset=0)或右侧(offset=1)插入一列；未选中时插入到最左侧或最右侧。
+
+        Args:
+            offset (int): 相对于选中列的偏移，0 表示左侧，1 表示右侧。
+        """
         selected = self.sheet.get_currently_selected()
+        side = "右侧" if offset else "左侧"
         if selected:
-            self.sheet.insert_rows(rows=1, idx=selected.row + 1)
-            self.update_row_index()
-            self.status_var.set(f"已在第 {selected.row+1} 行下方插入新行")
+            self.sheet.insert_columns(columns=1, idx=selected.column + offset)
+            self._schedule_index_refresh()
+            self.status_var.set(f"已在列 {Utils.column_label(selected.column)} {side}插入新列")
         else:
-            self.sheet.insert_rows(rows=1)
-            self.update_row_index()
-            self.status_var.set("已在底部插入新行")
+            self.sheet.insert_columns(columns=1, idx=None if offset else 0)
+            self._schedule_index_refresh()
+            self.status_var.set(f"已在最{side}插入新列")
+
+    def insert_row_above(self):
+        """在选中行上方插入行。"""
+        self._insert_row(0)
+    
+    def insert_row_below(self):
+        """在选中行下方插入行。"""
+        self._insert_row(1)
     
     def delete_row(self):
         """删除选中行。"""
@@ -370,7 +540,7 @@ class SpreadsheetApp:
         
         try:
             self.sheet.delete_rows(rows=selected.row)
-            self.update_row_index()
+            self._shift_dirty_rows(deleted=[selected.row])
             self.status_var.set(f"已删除第 {selected.row+1} 行")
         except Exception as e:
             messagebox.showerror("错误", f"删除行失败: {str(e)}")
@@ -378,29 +548,11 @@ class SpreadsheetApp:
     
     def insert_column_left(self):
         """在选中列左侧插入列。"""
-        selected = self.sheet.get_currently_selected()
-        if selected:
-            self.sheet.insert_columns(columns=1, idx=selected.column)
-            self.update_column_headers()
-            column_name = Utils.generate_column_headers(selected.column+1)[selected.column]
-            self.status_var.set(f"已在列 {column_name} 左侧插入新列")
-        else:
-            self.sheet.insert_columns(columns=1, idx=0)
-            self.update_column_headers()
-            self.status_var.set("已在最左侧插入新列")
+        self._insert_column(0)
     
     def insert_column_right(self):
         """在选中列右侧插入列。"""
-        selected = self.sheet.get_currently_selected()
-        if selected:
-            self.sheet.insert_columns(columns=1, idx=selected.column + 1)
-            self.update_column_headers()
-            column_name = Utils.generate_column_headers(selected.column+2)[selected.column+1]
-            self.status_var.set(f"已在列 {Utils.generate_column_headers(selected.column+1)[selected.column]} 右侧插入新列")
-        else:
-            self.sheet.insert_columns(columns=1)
-            self.update_column_headers()
-            self.status_var.set("已在最右侧插入新列")
+        self._insert_column(1)
     
     def delete_column(self):
         """删除选中列。"""
@@ -414,9 +566,9 @@ class SpreadsheetApp:
             return
         
         try:
-            column_name = Utils.generate_column_headers(selected.column+1)[selected.column]
+            column_name = Utils.column_label(selected.column)
             self.sheet.delete_columns(columns=selected.column)
-            self.update_column_headers()
+            self._schedule_index_refresh()
             self.status_var.set(f"已删除列 {column_name}")
         except Exception as e:
             messagebox.showerror("错误", f"删除列失败: {str(e)}")
@@ -428,15 +580,17 @@ class SpreadsheetApp:
             # 调用WikiExporter实例的方法获取Wiki内容
             wiki_text = self.wiki_exporter.get_wiki_content()
             self.root.clipboard_clear()
-            self.root.clipboard_append(wiki_text)
+            # 一次性追加完整文本，并直接指定STRING类型，省去X11下的格式协商
+            self.root.clipboard_append(wiki_text, type="STRING")
+            # 成功时只更新状态栏，不弹出会阻塞主循环的对话框
             self.status_var.set("Wiki内容已复制到剪贴板")
-            messagebox.showinfo("成功", "Wiki内容已复制到剪贴板！")
         except Exception as e:
             messagebox.showerror("错误", f"复制Wiki到剪贴板失败: {str(e)}")
 
     def run(self):
         """运行应用程序主循环。"""
         self.root.mainloop()
+        self._io_pool.shutdown(wait=True)
 
 
 if __name__ == "__main__":
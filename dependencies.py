@@ -28,9 +28,11 @@ try:
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
+    print("警告：Pillow库未安装，剪贴板图片功能不可用")
+    print("如需使用剪贴板功能，请运行：pip install Pillow")
 
-# 尝试导入 pandas 库
-# pandas 是一个强大的数据分析库，用于读取和处理Excel文件。
+# 尝试导入 pandas 库（可选）
+# pandas（配合xlrd）仅在未安装 python-calamine 时用于读取旧版 .xls 文件。
 try:
     import pandas
     PANDAS_AVAILABLE = True
@@ -53,13 +55,20 @@ try:
 except ImportError:
     OPENPYXL_AVAILABLE = False
 
+# 尝试导入 python-calamine 库（可选）
+# python-calamine 是基于Rust的Excel读取引擎，比openpyxl更快、更省内存。
+# 如果未安装，则读取Excel时回退到openpyxl引擎。
+try:
+    import python_calamine
+    CALAMINE_AVAILABLE = True
+except ImportError:
+    CALAMINE_AVAILABLE = False
+
 def check_dependencies():
     """检查所有必要的依赖库是否已安装。"""
     missing_deps = []
     if not TKSHEET_AVAILABLE:
         missing_deps.append("tksheet")
-    if not PANDAS_AVAILABLE:
-        missing_deps.append("pandas")
     if not XLSXWRITER_AVAILABLE:
         missing_deps.append("xlsxwriter")
     if not OPENPYXL_AVAILABLE:
@@ -74,10 +83,7 @@ def check_dependencies():
     return True
 
 def check_pillow_availability():
-    """检查 Pillow 库是否可用。"""
-    if not PIL_AVAILABLE:
-        print("警告：Pillow库未安装，剪贴板图片功能不可用")
-        print("如需使用剪贴板功能，请运行：pip install Pillow")
+    """检查 Pillow 库是否可用。缺失时的警告已在模块导入时输出一次。"""
     return PIL_AVAILABLE
 
 
@@ -6,18 +6,32 @@ file_handler.py
 包括Excel文件的打开、保存、另存为，以及完整包（Excel文件和相关assets）的导入和导出。
 """
 
+import io
 import os
 import shutil
+import uuid
 import zipfile
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox
-import pandas as pd
 import xlsxwriter
 from openpyxl import load_workbook
 from openpyxl.drawing.image import Image as OpenpyxlImage
 
 from utils import Utils
-from dependencies import PANDAS_AVAILABLE, XLSXWRITER_AVAILABLE, OPENPYXL_AVAILABLE
+from dependencies import XLSXWRITER_AVAILABLE, OPENPYXL_AVAILABLE, CALAMINE_AVAILABLE, PANDAS_AVAILABLE
+
+# 可识别的Excel文件扩展名
+_EXCEL_EXTS = (".xlsx", ".xls")
+
+
+def _cell_to_str(value):
+    """将读取到的单元格值转换为字符串：空值为空字符串，整数值的浮点数不带小数部分（与Excel显示一致）。"""
+    if value is None or value != value: # value != value 用于识别NaN
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
 
 class FileHandler:
     """处理文件操作的类，包括Excel的导入导出和完整包的管理。"""
@@ -37,8 +51,7 @@ class FileHandler:
         self.current_file = None  # 当前打开的Excel文件路径
 
         # 确保assets目录存在
-        if not os.path.exists(self.assets_dir):
-            os.makedirs(self.assets_dir)
+        os.makedirs(self.assets_dir, exist_ok=True)
 
     def save_excel_file(self):
         """保存Excel文件。如果已打开文件，则直接保存；否则另存为。"""
@@ -78,16 +91,16 @@ class FileHandler:
             excel_assets_dir = os.path.join(file_dir, f"{file_base}_assets")
             
             # 创建Excel文件对应的assets目录
-            if not os.path.exists(excel_assets_dir):
-                os.makedirs(excel_assets_dir)
+            os.makedirs(excel_assets_dir, exist_ok=True)
             
-            # 复制所有assets文件到Excel文件对应的assets目录
+            # 复制所有assets文件到Excel文件对应的assets目录（并行复制）
             if os.path.exists(self.assets_dir):
-                for file in os.listdir(self.assets_dir):
-                    src_path = os.path.join(self.assets_dir, file)
-                    dst_path = os.path.join(excel_assets_dir, file)
-                    if os.path.isfile(src_path):
-                        shutil.copy2(src_path, dst_path)
+                copy_pairs = []
+                with os.scandir(self.assets_dir) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            copy_pairs.append((entry.path, os.path.join(excel_assets_dir, entry.name)))
+                Utils.copy_files_parallel(copy_pairs)
             
             # 创建Excel工作簿和工作表
             workbook = xlsxwriter.Workbook(filename)
@@ -112,22 +125,38 @@ class FileHandler:
                 worksheet.write(0, col, str(header), header_format)
             
             # 写入数据（所有单元格都按字符串处理）
-            data = self.sheet.get_sheet_data()
+            # 先一次性把整个表格转换为字符串矩阵，写入时直接调用write_string，跳过write的类型分派
+            # tksheet中的单元格几乎都已是字符串，只对其他类型调用str()
+            data = [
+                [c if isinstance(c, str) else (str(c) if c else "") for c in row_data]
+                for row_data in self.sheet.get_sheet_data()
+            ]
+            write_string = worksheet.write_string
+            # 预先扫描一次Excel对应的assets目录，得到 文件名 -> 路径 的映射，
+            # 插入图片时按文件名查表，不再为每张图片拼接路径并检查文件是否存在
+            with os.scandir(excel_assets_dir) as entries:
+                excel_assets = {entry.name: entry.path for entry in entries if entry.is_file()}
+            # 图片文件内容缓存：同一张图片被多个单元格引用时只从磁盘读取一次
+            image_bytes_cache = {}
             for row, row_data in enumerate(data):
                 for col, cell_value in enumerate(row_data):
                     if cell_value:
-                        # 将所有内容都转换为字符串
-                        cell_str = str(cell_value)
-                        worksheet.write(row + 1, col, cell_str, cell_format)
+                        write_string(row + 1, col, cell_value, cell_format)
                         
                         # 处理图片（插入到Excel中）
                         image_paths = Utils.extract_image_paths(cell_value)
                         for i, image_path in enumerate(image_paths):
                             # 使用Excel文件目录下的assets路径
-                            excel_image_path = os.path.join(excel_assets_dir, os.path.basename(image_path))
-                            if os.path.exists(excel_image_path):
+                            excel_image_path = excel_assets.get(os.path.basename(image_path))
+                            if excel_image_path is not None:
                                 try:
+                                    image_bytes = image_bytes_cache.get(excel_image_path)
+                                    if image_bytes is None:
+                                        with open(excel_image_path, "rb") as image_file:
+                                            image_bytes = image_file.read()
+                                        image_bytes_cache[excel_image_path] = image_bytes
                                     worksheet.insert_image(row + 1, col, excel_image_path, {
+                                        "image_data": io.BytesIO(image_bytes),
                                         "x_scale": 0.3,
                                         "y_scale": 0.3,
                                         "x_offset": 5,
@@ -158,6 +187,76 @@ class FileHandler:
         if filename:
             self._load_from_excel_file(filename)
 
+    def _read_excel_matrix(self, source, name=None):
+        """
+        读取Excel工作簿的第一个工作表，返回补齐到表格最小尺寸的字符串数据和列标题。
+        第一行作为表头，不计入数据。
+
+        Args:
+            source (str | file-like): Excel文件路径，或可读取的二进制文件对象（如ZIP包内的条目）。
+            name (str, optional): 文件名，用于在 source 为文件对象时判断文件格式；默认使用 source 路径。
+
+        Returns:
+            tuple: (data, column_headers)，data 为二维字符串列表。
+        """
+        if name is None:
+            name = source if isinstance(source, str) else ""
+        is_xls = name.lower().endswith(".xls")
+        if is_xls and not CALAMINE_AVAILABLE and not PANDAS_AVAILABLE:
+            raise ImportError("读取 .xls 文件需要安装 python-calamine 或 pandas（xlrd）")
+
+        # 直接读取单元格值得到二维列表，无需构建DataFrame
+        # 优先使用更快的calamine；否则xlsx使用只读模式的openpyxl，按行流式读取
+        workbook = None
+        try:
+            if CALAMINE_AVAILABLE:
+                import python_calamine
+                if isinstance(source, str):
+                    workbook = python_calamine.CalamineWorkbook.from_path(source)
+                else:
+                    workbook = python_calamine.CalamineWorkbook.from_filelike(source)
+                rows = iter(workbook.get_sheet_by_index(0).to_python(skip_empty_area=False))
+            elif is_xls:
+                # openpyxl不支持旧版.xls格式，交给pandas（xlrd）读取
+                import pandas as pd
+                df = pd.read_excel(source, header=None, dtype=str)
+                rows = iter(df.to_numpy(dtype=object).tolist())
+            else:
+                workbook = load_workbook(source, read_only=True, data_only=True)
+                rows = workbook.active.iter_rows(values_only=True)
+            
+            # 所有数据都按字符串处理，空单元格为空字符串
+            headers = next(rows, ())
+            data = [[_cell_to_str(value) for value in row] for row in rows]
+        finally:
+            # 只读模式的openpyxl和calamine都会保持文件句柄打开，读取完毕后立即关闭
+            if workbook is not None:
+                workbook.close()
+        
+        # 确保有足够的行和列，以适应tksheet的初始大小或数据量
+        min_rows = max(100, len(data))
+        min_cols = max(20, len(headers), max(map(len, data), default=0))
+        
+        # 扩展数据到最小尺寸，如果原始数据小于最小尺寸，则用空字符串填充
+        for row in data:
+            if len(row) < min_cols:
+                row.extend([""] * (min_cols - len(row)))
+        data.extend([[""] * min_cols for _ in range(min_rows - len(data))])
+        
+        # 生成Excel风格的列标题
+        column_headers = Utils.generate_column_headers(min_cols)
+        return data, column_headers
+
+    def _show_sheet_data(self, data, column_headers):
+        """将读取到的数据和列标题设置到tksheet表格中，调整行高后只重绘一次。"""
+        # 设置tksheet表格的数据和表头（暂不重绘）
+        self.sheet.set_sheet_data(data, redraw=False)
+        self.sheet.headers(column_headers, redraw=False)
+        
+        # 自动调整行高以适应内容，所有修改完成后只重绘一次
+        Utils.auto_adjust_row_heights(self.sheet, redraw=False)
+        self.sheet.redraw()
+
     def _load_from_excel_file(self, filename):
         """
         从Excel文件加载数据，并处理其中包含的图片。
@@ -166,40 +265,12 @@ class FileHandler:
         Args:
             filename (str): 要加载的Excel文件路径。
         """
-        if not PANDAS_AVAILABLE or not OPENPYXL_AVAILABLE:
-            messagebox.showerror("错误", "需要安装pandas和openpyxl库才能打开Excel文件。")
+        if not OPENPYXL_AVAILABLE and not CALAMINE_AVAILABLE:
+            messagebox.showerror("错误", "需要安装openpyxl或python-calamine库才能打开Excel文件。")
             return
 
         try:
-            # 使用pandas读取Excel文件，所有数据都按字符串处理
-            df = pd.read_excel(filename, header=0, dtype=str)
-            
-            # 填充NaN值为空字符串，确保数据完整性
-            df = df.fillna("")
-            
-            # 转换为列表格式，获取表头和数据
-            headers = [str(col) for col in df.columns.tolist()]
-            data = df.values.tolist()
-            
-            # 确保所有数据都是字符串类型
-            for row in data:
-                for i, cell in enumerate(row):
-                    row[i] = str(cell) if cell is not None else ""
-            
-            # 确保有足够的行和列，以适应tksheet的初始大小或数据量
-            min_rows = max(100, len(data))
-            min_cols = max(20, len(headers))
-            
-            # 扩展数据到最小尺寸，如果原始数据小于最小尺寸，则用空字符串填充
-            for row in data:
-                while len(row) < min_cols:
-                    row.append("")
-            
-            while len(data) < min_rows:
-                data.append([""] * min_cols)
-            
-            # 生成Excel风格的列标题
-            column_headers = Utils.generate_column_headers(min_cols)
+            data, column_headers = self._read_excel_matrix(filename)
             
             # 处理Excel文件目录下的assets文件夹
             file_dir = os.path.dirname(filename)
@@ -208,34 +279,31 @@ class FileHandler:
             
             # 如果存在Excel文件的assets目录，复制其内容到当前应用程序的assets目录
             if os.path.exists(excel_assets_dir):
-                if not os.path.exists(self.assets_dir):
-                    os.makedirs(self.assets_dir)
+                os.makedirs(self.assets_dir, exist_ok=True)
+                # 一次读取目标目录中已有的文件名，冲突检查在内存中完成
+                with os.scandir(self.assets_dir) as entries:
+                    existing_names = {entry.name for entry in entries}
                 
-                for file in os.listdir(excel_assets_dir):
-                    src_path = os.path.join(excel_assets_dir, file)
-                    dst_path = os.path.join(self.assets_dir, file)
-                    if os.path.isfile(src_path):
+                with os.scandir(excel_assets_dir) as entries:
+                    for entry in entries:
+                        if not entry.is_file():
+                            continue
+                        dst_name = entry.name
                         # 如果目标文件已存在，重命名以避免冲突
-                        if os.path.exists(dst_path):
-                            name, ext = os.path.splitext(file)
-                            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                            new_name = f"{name}_{timestamp}{ext}"
-                            dst_path = os.path.join(self.assets_dir, new_name)
+                        if dst_name in existing_names:
+                            name, ext = os.path.splitext(entry.name)
+                            dst_name = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
+                        existing_names.add(dst_name)
                         
-                        shutil.copy2(src_path, dst_path)
+                        Utils.link_or_copy_file(entry.path, os.path.join(self.assets_dir, dst_name))
                 
                 self.status_var.set(f"已从 {excel_assets_dir} 导入图片文件")
             
-            # 设置tksheet表格的数据和表头
-            self.sheet.set_sheet_data(data)
-            self.sheet.headers(column_headers)
+            self._show_sheet_data(data, column_headers)
             
             # 设置当前文件路径
             self.current_file = filename
             
-            # 自动调整行高以适应内容
-            Utils.auto_adjust_row_heights(self.sheet)
-            
             self.status_var.set(f"已打开Excel文件: {filename}")
             messagebox.showinfo("成功", f"Excel文件打开成功！\n导入了 {len(data)} 行 {len(column_headers)} 列数据")
             
@@ -252,57 +320,72 @@ class FileHandler:
         if not filename:
             return
         
+        if not OPENPYXL_AVAILABLE and not CALAMINE_AVAILABLE:
+            messagebox.showerror("错误", "需要安装openpyxl或python-calamine库才能打开Excel文件。")
+            return
+        
         try:
-            import tempfile
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # 解压ZIP文件到临时目录
-                with zipfile.ZipFile(filename, "r") as zipf:
-                    zipf.extractall(temp_dir)
+            # 直接读取ZIP包中的条目，不再整体解压到临时目录
+            with zipfile.ZipFile(filename, "r") as zipf:
+                infos = zipf.infolist()
                 
-                # 查找解压后的Excel文件
-                excel_files = []
-                for root, dirs, files in os.walk(temp_dir):
-                    for file in files:
-                        if file.endswith((".xlsx", ".xls")):
-                            excel_files.append(os.path.join(root, file))
+                # 只遍历一次条目列表，查找第一个Excel文件和第一个assets文件夹
+                excel_info = None
+                assets_prefix = None
+                for info in infos:
+                    parts = info.filename.split("/")
+                    if assets_prefix is None and "assets" in parts[:-1]:
+                        assets_prefix = "/".join(parts[:parts.index("assets") + 1]) + "/"
+                    if excel_info is None and not info.is_dir() and parts[-1].endswith(_EXCEL_EXTS):
+                        excel_info = info
+                    if excel_info is not None and assets_prefix is not None:
+                        break
                 
-                if not excel_files:
+                if excel_info is None:
                     messagebox.showerror("错误", "ZIP包中没有找到Excel文件")
                     return
                 
-                # 默认使用找到的第一个Excel文件
-                excel_file = excel_files[0]
+                # Excel文件旁边的 <文件名>_assets 文件夹中的图片同样需要导入
+                excel_dir, _, excel_name = excel_info.filename.rpartition("/")
+                sibling_prefix = f"{excel_dir}/" if excel_dir else ""
+                sibling_prefix += f"{os.path.splitext(excel_name)[0]}_assets/"
+                prefixes = [p for p in (assets_prefix, sibling_prefix) if p]
                 
-                # 查找解压后的assets文件夹
-                assets_dirs = []
-                for root, dirs, files in os.walk(temp_dir):
-                    if "assets" in dirs:
-                        assets_dirs.append(os.path.join(root, "assets"))
-                
-                # 复制assets文件夹内容到应用程序的assets目录
-                if assets_dirs:
-                    assets_src_dir = assets_dirs[0]
-                    if not os.path.exists(self.assets_dir):
-                        os.makedirs(self.assets_dir)
-                    
-                    for file in os.listdir(assets_src_dir):
-                        src_path = os.path.join(assets_src_dir, file)
-                        dst_path = os.path.join(self.assets_dir, file)
-                        if os.path.isfile(src_path):
-                            # 处理文件名冲突
-                            if os.path.exists(dst_path):
-                                name, ext = os.path.splitext(file)
-                                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                                new_name = f"{name}_{timestamp}{ext}"
-                                dst_path = os.path.join(self.assets_dir, new_name)
-                            
-                            shutil.copy2(src_path, dst_path)
-                
-                # 加载Excel文件到表格
-                self._load_from_excel_file(excel_file)
+                # 只把assets文件夹下的直接文件解压到应用程序的assets目录
+                asset_infos = [
+                    info for info in infos
+                    if not info.is_dir() and any(
+                        info.filename.startswith(prefix) and "/" not in info.filename[len(prefix):]
+                        for prefix in prefixes
+                    )
+                ]
+                if asset_infos:
+                    os.makedirs(self.assets_dir, exist_ok=True)
+                    # 一次读取目标目录中已有的文件名，冲突检查在内存中完成
+                    with os.scandir(self.assets_dir) as entries:
+                        existing_names = {entry.name for entry in entries}
+                    for info in asset_infos:
+                        src_name = info.filename.rpartition("/")[2]
+                        dst_name = src_name
+                        # 处理文件名冲突
+                        if dst_name in existing_names:
+                            name, ext = os.path.splitext(src_name)
+                            dst_name = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
+                        existing_names.add(dst_name)
+                        
+                        with zipf.open(info) as src, open(os.path.join(self.assets_dir, dst_name), "wb") as dst:
+                            shutil.copyfileobj(src, dst)
                 
-                messagebox.showinfo("成功", "完整包导入成功！")
-                self.status_var.set("完整包导入成功")
+                # Excel文件只读入内存（读取器需要可随机访问的文件对象），不落盘
+                with zipf.open(excel_info) as fp:
+                    data, column_headers = self._read_excel_matrix(io.BytesIO(fp.read()), excel_name)
+            
+            # 加载数据到表格；包内的Excel没有对应的磁盘文件，保存时需重新选择路径
+            self._show_sheet_data(data, column_headers)
+            self.current_file = None
+            
+            messagebox.showinfo("成功", f"完整包导入成功！\n导入了 {len(data)} 行 {len(column_headers)} 列数据")
+            self.status_var.set("完整包导入成功")
                 
         except Exception as e:
             messagebox.showerror("错误", f"导入失败: {str(e)}")
@@ -324,7 +407,20 @@ class FileHandler:
             return
         
         try:
-            with zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as zipf:
+            # 表头和表格数据必须在UI线程中读取：tksheet 的 headers() 即使只是读取也会调用 after()，
+            # 在工作线程中调用时要等UI线程处理，而UI线程正在下面等待任务结果，两边会互相等待
+            headers = self.sheet.headers()
+            rows = self.sheet.get_sheet_data()
+            wiki_chunks = wiki_exporter_instance._iter_wiki_chunks(include_images=False) # 打包的Wiki只包含文本
+            # Excel和Wiki内容互不依赖，在线程池中同时生成到各自的内存缓冲区，
+            # 主线程同时把assets文件压缩写入ZIP包，三者互相重叠；任务只处理上面读出的数据，不再访问表格控件
+            excel_buffer = io.BytesIO()
+            wiki_buffer = io.StringIO()
+            with ThreadPoolExecutor(max_workers=2) as pool, \
+                    zipfile.ZipFile(filename, "w", zipfile.ZIP_DEFLATED) as zipf:
+                excel_future = pool.submit(self._save_excel_sync, excel_buffer, headers, rows)
+                wiki_future = pool.submit(wiki_buffer.writelines, wiki_chunks)
+                
                 # 添加assets文件夹中的所有文件到ZIP包
                 if os.path.exists(self.assets_dir):
                     for root, dirs, files in os.walk(self.assets_dir):
@@ -334,17 +430,11 @@ class FileHandler:
                             arcname = os.path.relpath(file_path, ".")
                             zipf.write(file_path, arcname)
                 
-                # 导出Excel文件到临时位置并添加到ZIP包
-                temp_excel = "temp_export.xlsx"
-                self._save_excel_sync(temp_excel)
-                zipf.write(temp_excel, "表格数据.xlsx")
-                os.remove(temp_excel)
-                
-                # 导出Wiki文件到临时位置并添加到ZIP包
-                temp_wiki = "temp_export.txt"
-                wiki_exporter_instance._export_wiki_sync(temp_wiki) # 调用WikiExporter的同步导出方法
-                zipf.write(temp_wiki, "表格数据_wiki.txt")
-                os.remove(temp_wiki)
+                # 等待两个生成任务完成（任务中的异常在此处抛出），再写入ZIP包
+                excel_future.result()
+                zipf.writestr("表格数据.xlsx", excel_buffer.getvalue())
+                wiki_future.result()
+                zipf.writestr("表格数据_wiki.txt", wiki_buffer.getvalue().encode("utf-8"))
             
             messagebox.showinfo("成功", "完整包导出成功！")
             self.status_var.set("完整包导出成功")
@@ -352,15 +442,18 @@ class FileHandler:
         except Exception as e:
             messagebox.showerror("错误", f"导出失败: {str(e)}")
 
-    def _save_excel_sync(self, filename):
+    def _save_excel_sync(self, output, headers, rows):
         """
         同步保存Excel（用于打包）。
-        此方法用于在不弹出文件对话框的情况下，将当前表格数据保存为Excel文件。
+        此方法用于在不弹出文件对话框的情况下，将给定的表格数据保存为Excel文件；
+        不访问表格控件，可以在后台线程中调用。
 
         Args:
-            filename (str): 要保存的Excel文件路径。
+            output (str | io.BytesIO): 要保存的Excel文件路径，或用于接收文件内容的内存缓冲区。
+            headers (list): 在UI线程中读取的列标题。
+            rows (list): 在UI线程中读取的表格数据（二维列表）。
         """
-        workbook = xlsxwriter.Workbook(filename)
+        workbook = xlsxwriter.Workbook(output, {"in_memory": True})
         worksheet = workbook.add_worksheet("表格数据")
         
         # 设置格式
@@ -377,18 +470,19 @@ class FileHandler:
         })
         
         # 写入表头
-        headers = self.sheet.headers()
         for col, header in enumerate(headers):
             worksheet.write(0, col, str(header), header_format)
         
         # 写入数据（所有单元格都按字符串处理）
-        data = self.sheet.get_sheet_data()
+        data = [
+            [c if isinstance(c, str) else (str(c) if c else "") for c in row_data]
+            for row_data in rows
+        ]
+        write_string = worksheet.write_string
         for row, row_data in enumerate(data):
             for col, cell_value in enumerate(row_data):
                 if cell_value:
-                    # 将所有内容都转换为字符串
-                    cell_str = str(cell_value)
-                    worksheet.write(row + 1, col, cell_str, cell_format)
+                    write_string(row + 1, col, cell_value, cell_format)
         
         # 设置列宽
         for col in range(len(headers)):
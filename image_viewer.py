@@ -3,12 +3,15 @@
 image_viewer.py
 
 此模块定义了 ImageViewerWindow 类，用于创建一个独立的窗口来显示图片。
-它支持图片的放大、缩小、重置大小以及在图片列表中的切换。
+它支持图片的放大、缩小、适应窗口、恢复原始大小以及在图片列表中的切换。
+图片打开时默认缩小到适应窗口（小图按原始大小显示），可通过"原始"按钮查看100%大小。
 """
 
 import tkinter as tk
 from tkinter import ttk
+import math
 import os
+from collections import OrderedDict
 
 # 从dependencies导入PIL可用性检查
 from dependencies import check_pillow_availability
@@ -23,13 +26,23 @@ except ImportError:
 
 class ImageViewerWindow:
     """图片查看器窗口"""
-    def __init__(self, parent, image_paths):
+
+    # 缓存的已渲染图块（PhotoImage）数量上限，约对应最近的几次缩放/滚动位置
+    TILE_CACHE_SIZE = 8
+    # 保留的已解码图片（当前图片及预解码的相邻图片）数量上限，避免大量高分辨率图片同时占用内存
+    PRELOAD_CACHE_SIZE = 4
+
+    def __init__(self, parent, image_paths, preloaded_images=None, executor=None):
         """
         初始化图片查看器窗口。
 
         Args:
             parent: 父Tkinter窗口。
             image_paths (list): 包含要显示图片文件路径的列表。
+            preloaded_images (dict, optional): 图片路径到 decode_image 结果 (PIL Image, 原始尺寸) 的映射，
+                命中时直接使用，不再从磁盘重新解码。
+            executor (concurrent.futures.Executor, optional): 用于在后台预解码相邻图片的线程池；
+                未提供时不进行预解码。
         """
         self.window = tk.Toplevel(parent)
         self.window.title("图片详情")
@@ -67,7 +80,8 @@ class ImageViewerWindow:
         # 垂直滚动条
         self.v_scroll = tk.Scrollbar(display_frame, orient="vertical", command=self.canvas.yview)
         self.v_scroll.pack(side="right", fill="y")
-        self.canvas.configure(xscrollcommand=self.h_scroll.set, yscrollcommand=self.v_scroll.set)
+        # 视图变化（滚动、缩放、窗口尺寸改变）时同步滚动条，并重新渲染可见区域
+        self.canvas.configure(xscrollcommand=self._on_canvas_xscroll, yscrollcommand=self._on_canvas_yscroll)
         self._canvas_img = None  # 用于存储PhotoImage对象
         # 滚轮事件
         self.canvas.bind("<MouseWheel>", self._on_mouse_wheel) # Windows/macOS
@@ -79,16 +93,29 @@ class ImageViewerWindow:
         self.btn_frame.place(in_=self.canvas, x=8, y=8)
         ttk.Button(self.btn_frame, text="放大", width=4, command=self.zoom_in).pack(side="left", padx=(0, 2))
         ttk.Button(self.btn_frame, text="缩小", width=4, command=self.zoom_out).pack(side="left", padx=(0, 2))
+        ttk.Button(self.btn_frame, text="适应", width=4, command=self.fit_to_window).pack(side="left", padx=(0, 2))
         ttk.Button(self.btn_frame, text="原始", width=5, command=self.reset_zoom).pack(side="left", padx=(0, 2))
         ttk.Button(self.btn_frame, text="关闭", width=4, command=self.window.destroy).pack(side="left")
 
         # 内部数据状态
         self.image_paths = image_paths
-        self.current_image = None  # 当前加载的PIL Image对象
-        self.zoom_factor = 1.0  # 缩放比例
+        self._executor = executor
+        # 后台预解码的图片（路径 -> (PIL Image, 原始尺寸)），按最近使用排序，超出上限时丢弃最久未用的
+        self._preloaded_images = OrderedDict(preloaded_images or {})
+        self._decoding_paths = set()  # 正在后台解码的图片路径
+        self._failed_paths = set()  # 解码失败的图片路径，不再重复尝试预解码
+        self._full_decode_paths = set()  # 已请求在后台完整解码（替换草稿）的图片路径
+        self._tile_cache = OrderedDict()  # (渲染参数) -> PhotoImage，按最近使用排序
+        self.current_image = None  # 当前加载的PIL Image对象（JPEG可能是按比例缩小解码的草稿）
+        self._image_size = (0, 0)  # 图片文件的原始尺寸，缩放和滚动区域都以此为准
+        self.zoom_factor = 1.0  # 缩放比例（相对于原始尺寸）
+        # 预解码时的目标尺寸上限：查看器窗口最大化显示，Canvas不会超过屏幕尺寸
+        self._max_size = (self.window.winfo_screenwidth(), self.window.winfo_screenheight())
         self.current_image_path = None  # 当前显示图片的路径
         self._canvas_img_id = None  # Canvas上图片项的ID
         self._last_scroll = (0, 0)  # 记录上次滚动位置
+        self._render_pending = None  # 待执行的可见区域渲染任务（after句柄）
+        self._refine_pending = None  # 缩放停止后的高质量重绘任务（after句柄）
 
         # 填充图片列表框
         for i, path in enumerate(image_paths):
@@ -98,8 +125,9 @@ class ImageViewerWindow:
                 self.image_listbox.insert(tk.END, f"{i+1}. [不存在] {os.path.basename(path)}")
         # 绑定列表框选择事件
         self.image_listbox.bind("<<ListboxSelect>>", self.on_image_select)
-        # 如果有图片，默认选中第一张并显示
+        # 如果有图片，默认选中第一张并显示（先完成布局，以便按Canvas的实际尺寸计算初始缩放）
         if self.image_listbox.size() > 0:
+            self.window.update_idletasks()
             self.image_listbox.selection_set(0)
             self.on_image_select()
 
@@ -124,10 +152,31 @@ class ImageViewerWindow:
                 self._is_maximized = False
 
     def _on_canvas_configure(self, event):
-        """处理Canvas配置改变事件，用于在图片尺寸变化后保持滚动条位置。"""
+        """处理Canvas配置改变事件，用于在图片尺寸变化后保持滚动条位置，并重新渲染可见区域。"""
         if self._last_scroll != (0, 0):
             self.canvas.xview_moveto(self._last_scroll[0])
             self.canvas.yview_moveto(self._last_scroll[1])
+        self._schedule_view_render()
+
+    def _on_canvas_xscroll(self, first, last):
+        """Canvas水平视图变化回调：更新滚动条并安排重新渲染可见区域。"""
+        self.h_scroll.set(first, last)
+        self._schedule_view_render()
+
+    def _on_canvas_yscroll(self, first, last):
+        """Canvas垂直视图变化回调：更新滚动条并安排重新渲染可见区域。"""
+        self.v_scroll.set(first, last)
+        self._schedule_view_render()
+
+    def _schedule_render(self, fast=False, delay=30):
+        """合并短时间内的多次视图变化，延迟 delay 毫秒后只渲染一次可见区域。"""
+        if self._render_pending:
+            self.canvas.after_cancel(self._render_pending)
+        self._render_pending = self.canvas.after(delay, self._render_visible, fast)
+
+    def _schedule_view_render(self):
+        """视图变化后安排重新渲染。缩放后的高质量重绘尚未执行时继续使用快速渲染，由该重绘统一完成精细渲染。"""
+        self._schedule_render(fast=self._refine_pending is not None)
 
     def _on_mouse_wheel(self, event):
         """处理鼠标滚轮事件，用于滚动Canvas。"""
@@ -148,9 +197,78 @@ class ImageViewerWindow:
         index = selection[0]
         if index < len(self.image_paths):
             self.load_image(self.image_paths[index])
+            # 在后台线程中预先解码相邻的图片，切换时无需等待解码
+            self.window.after_idle(self._predecode_adjacent, index)
+
+    def _predecode_adjacent(self, index):
+        """在后台线程中预先解码列表中与 index 相邻的图片，完成后保存到预加载缓存中。"""
+        if not PIL_AVAILABLE or self._executor is None or not self.window.winfo_exists():
+            return
+        for i in (index + 1, index - 1):
+            if not 0 <= i < len(self.image_paths):
+                continue
+            path = self.image_paths[i]
+            if (path in self._preloaded_images or path in self._decoding_paths
+                    or path in self._failed_paths or not os.path.exists(path)):
+                continue
+            self._decoding_paths.add(path)
+            future = self._executor.submit(self.decode_image, path, self._max_size)
+            future.add_done_callback(lambda f, path=path: self._post_to_ui(self._on_predecoded, path, f))
+
+    @staticmethod
+    def decode_image(path, max_size=None, load=True):
+        """
+        打开并解码图片，可在后台线程中调用。
+        图片大于 max_size 时，查看器会以适应窗口的比例打开它；JPEG在解码时即可按 1/2、1/4、1/8 缩小，
+        因此只解码足够以该比例显示的草稿（draft，其他格式会忽略），放大超出草稿精度时查看器再按原路径完整解码。
+
+        Args:
+            path (str): 图片文件路径。
+            max_size (tuple, optional): 显示区域的最大尺寸 (宽, 高)；为 None 时完整解码。
+            load (bool): 是否立即解码；为 False 时只读取文件头，像素数据在首次使用时才解码。
+
+        Returns:
+            tuple: (PIL Image, 图片的原始尺寸)。
+        """
+        image = Image.open(path)
+        original_size = image.size
+        if max_size:
+            zoom = ImageViewerWindow.fit_zoom(original_size, max_size)
+            if zoom < 1.0:
+                image.draft(image.mode, (math.ceil(original_size[0] * zoom), math.ceil(original_size[1] * zoom)))
+        if load:
+            image.load()
+        return image, original_size
+
+    @staticmethod
+    def fit_zoom(image_size, box_size):
+        """返回让图片完整显示在 box_size 内的缩放比例，不放大小图（最大为1）。"""
+        return min(1.0, box_size[0] / image_size[0], box_size[1] / image_size[1])
+
+    def _post_to_ui(self, callback, *args):
+        """从后台线程安排 callback 在UI线程中执行；窗口已关闭时直接忽略。"""
+        try:
+            self.window.after(0, callback, *args)
+        except (tk.TclError, RuntimeError):
+            pass
+
+    def _on_predecoded(self, path, future):
+        """后台解码完成后在UI线程中记录结果。"""
+        self._decoding_paths.discard(path)
+        if future.exception() is not None:
+            self._failed_paths.add(path) # 无法解码的图片在真正选中时再显示错误信息
+            return
+        self._remember_image(path, future.result())
+
+    def _remember_image(self, path, decoded):
+        """把 decode_image 的结果放入预加载缓存，超出上限时丢弃最久未使用的图片。"""
+        self._preloaded_images[path] = decoded
+        self._preloaded_images.move_to_end(path)
+        while len(self._preloaded_images) > self.PRELOAD_CACHE_SIZE:
+            self._preloaded_images.popitem(last=False)
 
     def load_image(self, image_path):
-        """加载指定路径的图片文件。"""
+        """加载指定路径的图片文件，以适应窗口的缩放比例显示（不放大小图）。"""
         self.current_image_path = image_path
         if not os.path.exists(image_path):
             self.canvas.delete("all")
@@ -161,48 +279,153 @@ class ImageViewerWindow:
             self.canvas.create_text(10, 10, anchor="nw", text=f"图片文件: {os.path.basename(image_path)}\n(需要Pillow库显示图片)", fill="black")
             return
         try:
-            self.current_image = Image.open(image_path)
-            self.zoom_factor = 1.0  # 每次加载新图片时重置缩放比例
+            preloaded = self._preloaded_images.get(image_path)
+            if preloaded is not None:
+                image, self._image_size = preloaded
+                self._preloaded_images.move_to_end(image_path)
+            else:
+                # 未预解码的图片按需打开，像素数据在首次渲染时才解码（JPEG同样只解码草稿）
+                image, self._image_size = self.decode_image(image_path, self._max_size, load=False)
+            self.current_image = image
+            self._tile_cache.clear()  # 已渲染图块只对当前图片有效
+            # 每次加载新图片时重置缩放比例：大图缩小到适应Canvas，小图按原始尺寸显示；
+            # 这也是草稿解码的前提，适应窗口的比例不会超过草稿的精度
+            self.zoom_factor = self.fit_zoom(self._image_size, self._canvas_size())
             self.display_image()
         except Exception as e:
+            self._failed_paths.add(image_path)
             self.canvas.delete("all")
             self.canvas.create_text(10, 10, anchor="nw", text=f"无法加载图片: {str(e)}", fill="red")
 
-    def display_image(self):
-        """在Canvas上显示当前加载的图片，并应用缩放。"""
+    def _canvas_size(self):
+        """返回Canvas的当前尺寸；尚未完成布局时使用屏幕尺寸。"""
+        width, height = self.canvas.winfo_width(), self.canvas.winfo_height()
+        if width > 1 and height > 1:
+            return width, height
+        return self._max_size
+
+    def display_image(self, fast=False):
+        """
+        在Canvas上显示当前加载的图片，并应用缩放。
+        滚动区域按完整缩放尺寸设置，但只渲染当前可见的区域。
+
+        Args:
+            fast (bool): 为 True 时先用较快的BILINEAR算法渲染，缩放停止200ms后再用LANCZOS重绘。
+        """
         if not self.current_image or not PIL_AVAILABLE:
             return
+        # 先安排（或取消）高质量重绘：下面修改滚动区域触发的视图回调据此判断是否仍处于快速渲染阶段
+        if self._refine_pending:
+            self.canvas.after_cancel(self._refine_pending)
+            self._refine_pending = None
+        if fast:
+            self._refine_pending = self.canvas.after(200, self._render_visible)
         # 记录当前滚动条位置，以便在图片重新渲染后恢复
         self._last_scroll = (self.canvas.xview()[0], self.canvas.yview()[0])
         display_size = (
-            int(self.current_image.width * self.zoom_factor),
-            int(self.current_image.height * self.zoom_factor)
+            int(self._image_size[0] * self.zoom_factor),
+            int(self._image_size[1] * self.zoom_factor)
         )
-        # 使用LANCZOS高质量缩放算法
-        resized_image = self.current_image.resize(display_size, Image.Resampling.LANCZOS)
-        self._canvas_img = ImageTk.PhotoImage(resized_image)
-        self.canvas.delete("all")  # 清除Canvas上所有旧内容
-        # 在Canvas上创建图片，锚点设置为西北角
-        self._canvas_img_id = self.canvas.create_image(0, 0, anchor="nw", image=self._canvas_img)
         # 配置Canvas的滚动区域以适应图片大小
         self.canvas.config(scrollregion=(0, 0, display_size[0], display_size[1]))
         # 恢复滚动条位置
         self.canvas.xview_moveto(self._last_scroll[0])
         self.canvas.yview_moveto(self._last_scroll[1])
+        self._render_visible(fast)
+
+    def _render_visible(self, fast=False):
+        """只裁剪并缩放当前可见区域对应的原图部分，绘制到Canvas上。"""
+        self._render_pending = None
+        if not fast:
+            self._refine_pending = None
+        if not self.current_image or not PIL_AVAILABLE or not self.canvas.winfo_exists():
+            return
+        zoom = self.zoom_factor
+        orig_width, orig_height = self._image_size
+        # 草稿的分辨率不足以精细显示当前缩放时（放大超出适应窗口的比例），按原始路径重新完整解码
+        if not fast and zoom * orig_width > self.current_image.width \
+                and self.current_image.size != self._image_size:
+            self._request_full_image()
+        full_width = int(orig_width * zoom)
+        full_height = int(orig_height * zoom)
+        # 原图坐标到已解码图片坐标的比例（完整解码时为1）
+        scale_x = self.current_image.width / orig_width
+        scale_y = self.current_image.height / orig_height
+        # 计算可见区域在缩放后图片坐标系中的范围
+        x0 = max(0, min(int(self.canvas.canvasx(0)), full_width))
+        y0 = max(0, min(int(self.canvas.canvasy(0)), full_height))
+        x1 = min(full_width, x0 + self.canvas.winfo_width())
+        y1 = min(full_height, y0 + self.canvas.winfo_height())
+        self.canvas.delete("all")  # 清除Canvas上所有旧内容
+        if x1 <= x0 or y1 <= y0:
+            return
+        # 同一缩放尺寸和可见区域的图块已渲染过时直接复用
+        cache_key = (full_width, full_height, x0, y0, x1, y1, fast)
+        photo = self._tile_cache.get(cache_key)
+        if photo is None:
+            # 从原图中取出对应区域并直接缩放到可见尺寸（resize的box参数相当于先裁剪再缩放）
+            resample = Image.Resampling.BILINEAR if fast else Image.Resampling.LANCZOS
+            tile = self.current_image.resize(
+                (x1 - x0, y1 - y0), resample,
+                box=(x0 / zoom * scale_x, y0 / zoom * scale_y, x1 / zoom * scale_x, y1 / zoom * scale_y)
+            )
+            photo = ImageTk.PhotoImage(tile)
+            self._tile_cache[cache_key] = photo
+            if len(self._tile_cache) > self.TILE_CACHE_SIZE:
+                self._tile_cache.popitem(last=False)
+        else:
+            self._tile_cache.move_to_end(cache_key)
+        self._canvas_img = photo
+        # 在Canvas上可见区域的左上角创建图片，锚点设置为西北角
+        self._canvas_img_id = self.canvas.create_image(x0, y0, anchor="nw", image=self._canvas_img)
+
+    def _request_full_image(self):
+        """
+        按原始路径完整解码当前图片以替换草稿。
+        有线程池时在后台解码，完成前继续用草稿渲染；否则直接在UI线程中打开。
+        """
+        path = self.current_image_path
+        if self._executor is None:
+            self.current_image = Image.open(path)
+            self._tile_cache.clear()
+            return
+        if path in self._full_decode_paths:
+            return
+        self._full_decode_paths.add(path)
+        future = self._executor.submit(self.decode_image, path)
+        future.add_done_callback(lambda f: self._post_to_ui(self._on_full_decoded, path, f))
+
+    def _on_full_decoded(self, path, future):
+        """完整解码完成后在UI线程中替换草稿并重新渲染；解码失败时继续使用草稿，不再重试。"""
+        if future.exception() is not None:
+            return
+        self._full_decode_paths.discard(path)
+        self._remember_image(path, future.result())
+        if path == self.current_image_path:
+            self.current_image = future.result()[0]
+            self._tile_cache.clear()
+            self._schedule_render()
 
     def zoom_in(self):
         """放大图片。"""
         self.zoom_factor *= 1.2
-        self.display_image()
+        self.display_image(fast=True)
 
     def zoom_out(self):
         """缩小图片。"""
         self.zoom_factor /= 1.2
-        self.display_image()
+        self.display_image(fast=True)
+
+    def fit_to_window(self):
+        """把图片缩放到适应窗口（与打开图片时的默认比例相同）。"""
+        if not self.current_image:
+            return
+        self.zoom_factor = self.fit_zoom(self._image_size, self._canvas_size())
+        self.display_image(fast=True)
 
     def reset_zoom(self):
-        """重置图片缩放比例为原始大小。"""
+        """重置图片缩放比例为原始大小（100%），草稿会在重绘时换成完整解码的图片。"""
         self.zoom_factor = 1.0
-        self.display_image()
+        self.display_image(fast=True)
 
 
@@ -10,11 +10,57 @@ import os
 import re
 import shutil
 import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# 图片标记的公共前缀，用于在调用正则之前快速判断单元格是否包含图片
+_IMG_MARKER = "[IMG"
+# 以下正则在模块加载时编译一次
+# 匹配 [IMG] / [IMGS] 标记及其后的图片路径内容
+_IMG_PATHS_RE = re.compile(r'\[IMGS?\]\s*([^\[\]]+)')
+# 匹配图片标记及其内容，用于清理文本
+_IMG_SUB_RE = re.compile(r'\[IMGS?\][^\[\]]*')
+# 匹配连续的换行符
+_NL_RE = re.compile(r'\n+')
+
+# 列标题使用的字母表，按下标取字母，省去 chr() 调用
+_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# 已生成的Excel风格列标题缓存，按需增量扩展，下标即列索引
+_COLUMN_LABELS = list(_LETTERS)
+
+
+def _ensure_column_labels(count):
+    """确保列标题缓存中至少包含 count 个标题，每个新列只计算一次。"""
+    while len(_COLUMN_LABELS) < count:
+        label = ""
+        num = len(_COLUMN_LABELS) + 1
+        while num > 0:
+            num, rem = divmod(num - 1, 26)
+            label = _LETTERS[rem] + label
+        _COLUMN_LABELS.append(label)
+
 
 class Utils:
     """通用辅助函数类，提供各种静态方法。"""
 
+    # 图片标记的公共前缀，调用方可用 `Utils.IMAGE_MARKER in text` 预先跳过不含图片的单元格
+    IMAGE_MARKER = _IMG_MARKER
+
+    @staticmethod
+    def column_label(index):
+        """
+        获取单个列索引对应的Excel风格列标题 (0 -> A, 25 -> Z, 26 -> AA, ...)。
+        结果来自共享的标题缓存，状态栏等频繁调用的地方无需再生成整个标题列表。
+
+        Args:
+            index (int): 从0开始的列索引。
+
+        Returns:
+            str: 对应的列标题。
+        """
+        _ensure_column_labels(index + 1)
+        return _COLUMN_LABELS[index]
+
     @staticmethod
     def generate_column_headers(count):
         """
@@ -24,21 +70,12 @@ class Utils:
             count (int): 需要生成的列标题数量。
 
         Returns:
-            list: 包含Excel风格列标题的列表。
-        """
-        headers = []
-        for i in range(count):
-            header = ""
-            num = i
-            while True:
-                # 计算当前字符的ASCII码
-                header = chr(65 + (num % 26)) + header
-                num = num // 26
-                if num == 0:
-                    break
-                num -= 1 # 调整以处理AA, AB等情况
-            headers.append(header)
-        return headers
+            list: 包含Excel风格列标题的列表（缓存的切片副本，可安全修改）。
+        """
+        # 不超过26列时缓存中已有全部标题，直接切片
+        if count > 26:
+            _ensure_column_labels(count)
+        return _COLUMN_LABELS[:count]
 
     @staticmethod
     def extract_image_paths(cell_value):
@@ -55,15 +92,16 @@ class Utils:
         if not cell_value:
             return []
         
-        # 使用正则表达式匹配 [IMG] 和 [IMGS] 标记后的内容
-        pattern = r'\[IMGS?\]\s*([^\[\]]+)'
-        matches = re.findall(pattern, str(cell_value))
+        text = cell_value if isinstance(cell_value, str) else str(cell_value)
+        # 不含图片标记的普通文本单元格直接返回，无需进入正则匹配
+        if _IMG_MARKER not in text:
+            return []
         
+        # 使用预编译的正则表达式匹配 [IMG] 和 [IMGS] 标记后的内容（findall 直接返回分组文本，无需创建Match对象）
         image_paths = []
-        for match in matches:
-            # 分割多个路径（用分号分隔），并去除空白字符
-            paths = [path.strip() for path in match.split(';') if path.strip()]
-            image_paths.extend(paths)
+        for group in _IMG_PATHS_RE.findall(text):
+            # 分割多个路径（用分号分隔），每个路径只去除一次空白字符
+            image_paths.extend(path for path in map(str.strip, group.split(';')) if path)
         
         return image_paths
 
@@ -81,10 +119,12 @@ class Utils:
         if not cell_value:
             return ""
         
-        # 移除图片标记及其内容
-        clean_text = re.sub(r'\[IMGS?\][^\[\]]*', '', str(cell_value))
+        clean_text = cell_value if isinstance(cell_value, str) else str(cell_value)
+        # 移除图片标记及其内容（不含图片标记时跳过）
+        if _IMG_MARKER in clean_text:
+            clean_text = _IMG_SUB_RE.sub('', clean_text)
         # 移除多余的换行符并去除首尾空白
-        clean_text = re.sub(r'\n+', '\n', clean_text).strip()
+        clean_text = _NL_RE.sub('\n', clean_text).strip()
         return clean_text
 
     @staticmethod
@@ -124,6 +164,63 @@ class Utils:
         else:
             return image_tag
 
+    @staticmethod
+    def link_or_copy_file(src_path, dst_path, allow_link=True):
+        """
+        将文件放置到目标路径：优先创建硬链接（同一文件系统时无需复制数据），
+        失败时回退到 shutil.copyfile（只复制内容，不复制元数据，可使用零拷贝系统调用）。
+        先写入同目录下的临时文件再用 os.replace 替换目标，已存在的目标文件只会被换掉而不会被原地改写，
+        因此与目标共用同一份数据的其他硬链接文件不受影响。
+
+        Args:
+            src_path (str): 源文件路径。
+            dst_path (str): 目标文件路径，已存在时会被替换。
+            allow_link (bool): 是否允许使用硬链接；源文件不归本程序管理（如用户选择的原始图片）时应传 False，
+                               否则之后对原文件的修改会同时改变assets中的副本。
+        """
+        try:
+            if os.path.samefile(src_path, dst_path):
+                return # 目标已是同一文件（同一路径或指向它的硬链接），无需处理
+        except OSError:
+            pass # 目标不存在
+        tmp_path = f"{dst_path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            linked = False
+            if allow_link:
+                try:
+                    os.link(src_path, tmp_path)
+                    linked = True
+                except OSError:
+                    pass
+            if not linked:
+                shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, dst_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def copy_files_parallel(file_pairs, max_workers=8, batch_size=64):
+        """
+        使用线程池并行复制多个文件。文件复制主要阻塞在系统调用上，线程可以重叠这些IO等待。
+        按批次提交，避免一次性创建过多的future。
+
+        Args:
+            file_pairs (list): (源路径, 目标路径) 元组列表。
+            max_workers (int): 最大线程数。
+            batch_size (int): 每批提交的文件数量。
+        """
+        if not file_pairs:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for start in range(0, len(file_pairs), batch_size):
+                batch = file_pairs[start:start + batch_size]
+                # 消费结果，使复制中的异常在此处抛出
+                list(pool.map(lambda pair: Utils.link_or_copy_file(*pair), batch))
+
     @staticmethod
     def copy_images_to_assets(image_paths, assets_dir):
         """
@@ -138,15 +235,21 @@ class Utils:
             list: 复制后图片在assets目录中的相对路径列表。
         """
         relative_paths = []
+        # 一次读取目标目录中已有的文件名，冲突检查在内存中完成
+        with os.scandir(assets_dir) as entries:
+            existing_names = {entry.name for entry in entries}
         for image_path in image_paths:
             if os.path.exists(image_path):
-                base_name = os.path.basename(image_path)
-                name, ext = os.path.splitext(base_name)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                dest_name = f"{name}_{timestamp}{ext}"
+                dest_name = os.path.basename(image_path)
+                # 文件名冲突时添加随机后缀（同一秒内的批量复制也不会重名）
+                if dest_name in existing_names:
+                    name, ext = os.path.splitext(dest_name)
+                    dest_name = f"{name}_{uuid.uuid4().hex[:8]}{ext}"
+                existing_names.add(dest_name)
                 dest_path = os.path.join(assets_dir, dest_name)
                 
-                shutil.copy(image_path, dest_path)
+                # 用户选择的原始图片不归本程序管理，只复制不建立硬链接
+                Utils.link_or_copy_file(image_path, dest_path, allow_link=False)
                 # 返回相对于当前工作目录的相对路径
                 relative_paths.append(os.path.relpath(dest_path, start=os.getcwd()))
         
@@ -175,36 +278,37 @@ class Utils:
         text_content = Utils.clean_text_content(current_value)
         existing_images = Utils.extract_image_paths(current_value)
         
-        # 合并图片路径（去重但保持顺序）
-        all_images = existing_images + new_image_paths
-        unique_images = []
-        for img in all_images:
-            if img not in unique_images:
-                unique_images.append(img)
+        # 合并图片路径（去重但保持顺序，dict 保留插入顺序且查找为O(1)）
+        unique_images = list(dict.fromkeys(existing_images + list(new_image_paths)))
         
         # 更新单元格内容
         new_value = Utils.format_cell_with_images(text_content, unique_images)
         sheet.set_cell_data(row, col, new_value)
 
     @staticmethod
-    def auto_adjust_row_heights(sheet):
+    def auto_adjust_row_heights(sheet, rows=None, redraw=True):
         """
         自动调整tksheet表格的行高，以适应单元格内容（包括多行文本）。
 
         Args:
             sheet: tksheet 表格实例。
+            rows (list | range, optional): 只调整这些行；为 None 时调整所有行。
+            redraw (bool): 行高变化后是否立即重绘；调用方需要合并多次修改时可传 False 并自行重绘。
         """
-        for row in range(sheet.get_total_rows()):
-            max_lines = 1
-            for col in range(sheet.get_total_columns()):
-                cell_value = sheet.get_cell_data(row, col)
-                if cell_value:
-                    # 计算单元格内容包含的行数
-                    lines = str(cell_value).count('\n') + 1
-                    max_lines = max(max_lines, lines)
-            
+        if rows is None:
+            rows = range(sheet.get_total_rows())
+        # 一次性读取相关行的数据和当前行高，计算后通过一次批量调用写回，最后统一重绘一次
+        heights = sheet.get_row_heights()
+        changed = False
+        for row, row_data in zip(rows, sheet.get_sheet_data(only_rows=rows)):
+            # 计算该行单元格内容包含的最大行数
+            max_lines = 1 + max((str(value).count('\n') for value in row_data if value), default=0)
             # 设置行高（每行约20像素，最小25像素）
             height = max(25, max_lines * 20)
-            sheet.row_height(row=row, height=height)
-
-
+            if heights[row] != height:
+                heights[row] = height
+                changed = True
+        if changed:
+            sheet.set_row_heights(heights)
+            if redraw:
+                sheet.redraw()
@@ -1,9 +1,17 @@
 
 import os
-from tkinter import filedialog, messagebox
+import threading
+from tkinter import TclError, filedialog, messagebox
 
 from utils import Utils
 
+# 单元格文本转为Wiki时的字符替换表（换行 -> Wiki强制换行 \\），模块加载时构建一次；
+# 以后需要转义更多字符时加入此表即可，translate 只扫描一遍字符串
+_WIKI_TRANS = str.maketrans({"\n": "\\\\"})
+# 空单元格的渲染结果
+_EMPTY_CELL = ("", ())
+
+
 class WikiExporter:
     """处理Confluence Wiki导出功能的类。"""
 
@@ -20,66 +28,185 @@ class WikiExporter:
         )
         if not filename:
             return
+        # 在UI线程中读取表格数据，生成和写入文件在后台线程中进行，导出大表格时界面不会卡住
+        # （非守护线程：退出程序时会等待文件写完）
+        chunks = self._iter_wiki_chunks(snapshot=True)
+        threading.Thread(target=self._write_wiki_file, args=(filename, chunks)).start()
+        self.status_var.set("正在导出Wiki...")
+
+    def _write_wiki_file(self, filename, chunks):
+        """
+        在后台线程中把Wiki片段写入文件，完成后通过 after 回到UI线程显示结果。
+
+        Args:
+            filename (str): 目标文件路径。
+            chunks: _iter_wiki_chunks 返回的生成器。
+        """
         try:
-            wiki_content = self.get_wiki_content()
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(wiki_content)
-            messagebox.showinfo("成功", "Wiki文件导出成功！")
-            self.status_var.set("Wiki导出完成")
+            # 逐段写入带1MiB缓冲区的文件，无需在内存中拼接完整的Wiki文本；
+            # newline="" 关闭换行符转换，写入时无需逐段扫描"\n"，各平台输出与打包导出一致
+            with open(filename, "w", encoding="utf-8", buffering=1 << 20, newline="") as f:
+                f.writelines(chunks)
         except Exception as e:
-            messagebox.showerror("错误", f"导出失败: {str(e)}")
+            self._post_to_ui(self._on_wiki_export_failed, str(e))
+        else:
+            self._post_to_ui(self._on_wiki_exported)
+
+    def _post_to_ui(self, callback, *args):
+        """从后台线程安排 callback 在UI线程中执行；导出期间窗口已关闭时直接忽略。"""
+        try:
+            self.sheet.after(0, callback, *args)
+        except (TclError, RuntimeError):
+            pass
+
+    def _on_wiki_exported(self):
+        """Wiki文件导出成功后在UI线程中提示。"""
+        self.status_var.set("Wiki导出完成")
+        messagebox.showinfo("成功", "Wiki文件导出成功！")
+
+    def _on_wiki_export_failed(self, error):
+        """Wiki文件导出失败后在UI线程中提示。"""
+        self.status_var.set("Wiki导出失败")
+        messagebox.showerror("错误", f"导出失败: {error}")
+
+    def _header_row(self):
+        """生成Wiki表格的表头行。先构建列表再 join，join 可以一次算出结果长度。"""
+        headers = [str(h) for h in self.sheet.headers()]
+        return f"||{'||'.join(headers)}||\n"
 
     def get_wiki_content(self):
-        """生成Wiki内容字符串，供导出和复制复用。"""
-        wiki_content = []
+        """生成完整的Wiki内容字符串（用于复制到剪贴板等需要整段文本的场合）。"""
+        return "".join(self._iter_wiki_chunks())
+
+    def _make_cell_renderer(self, include_images=True):
+        """
+        创建单个单元格的渲染函数。每个单元格的全部转换（清理文本、转义换行、解析图片）都集中在这里，
+        函数内用到的辅助函数和缓存都绑定为闭包变量，省去逐个单元格的属性查找。
+
+        Args:
+            include_images (bool): 为 False 时只渲染文本，不解析图片。
+
+        Returns:
+            callable: render_cell(cell_value) -> (单元格Wiki文本, 引用到的图片文件名元组)，空单元格返回 ("", ())。
+        """
+        # 图片路径 -> 文件名（文件不存在时为None），同一路径在多个单元格中出现时只检查一次
+        image_name_cache = {}
+        # 目录 -> 目录中的文件名集合；图片通常集中在同一个assets目录，每个目录只用 scandir 读取一次
+        dir_entries_cache = {}
+        clean_text_content = Utils.clean_text_content
+        extract_image_paths = Utils.extract_image_paths
+        path_exists = os.path.exists
+        split_path = os.path.split
+        not_cached = object()
+        image_marker = Utils.IMAGE_MARKER
+        # 单元格原始值 -> 渲染结果；表格中常有重复的值（状态、枚举等），相同的值只渲染一次
+        rendered_cache = {}
+
+        def image_name_of(image_path):
+            # 已检查过的路径只需一次字典查找
+            image_name = image_name_cache.get(image_path, not_cached)
+            if image_name is not_cached:
+                # 一次 split 同时得到目录和文件名
+                directory, image_name = split_path(image_path)
+                directory = directory or "."
+                names = dir_entries_cache.get(directory)
+                if names is None:
+                    try:
+                        with os.scandir(directory) as entries:
+                            names = {entry.name for entry in entries}
+                    except OSError:
+                        names = set()
+                    dir_entries_cache[directory] = names
+                # 不在列表中时再单独检查一次（大小写不敏感的文件系统上文件名可能大小写不同）
+                if image_name not in names and not path_exists(image_path):
+                    image_name = None
+                image_name_cache[image_path] = image_name
+            return image_name
+
+        def render_cell(cell_value):
+            if not cell_value:
+                return _EMPTY_CELL
+            rendered = rendered_cache.get(cell_value)
+            if rendered is None:
+                # 限制缓存大小，避免值几乎各不相同的大表格占用过多内存
+                if len(rendered_cache) > 10000:
+                    rendered_cache.clear()
+                rendered = rendered_cache[cell_value] = _render(cell_value)
+            return rendered
+
+        def _render(cell_value):
+            cell_content = ""
+            # 只保留文本内容
+            clean_text = clean_text_content(cell_value)
+            if clean_text:
+                cell_content = clean_text.translate(_WIKI_TRANS)
+            # 处理图片（大多数单元格只有文本，不含图片标记时跳过正则提取）
+            if not (include_images and isinstance(cell_value, str) and image_marker in cell_value):
+                return cell_content, ()
+            image_names = [
+                image_name for image_name in map(image_name_of, extract_image_paths(cell_value))
+                if image_name is not None
+            ]
+            if image_names:
+                # 单张图片（最常见）直接用f-string拼接，多张图片才需要 join
+                if len(image_names) == 1:
+                    image_refs = f"!{image_names[0]}!"
+                else:
+                    image_refs = "|".join([f"!{image_name}!" for image_name in image_names])
+                cell_content = f"{cell_content}|{image_refs}" if cell_content else image_refs
+            return cell_content, tuple(image_names)
+
+        return render_cell
+
+    def _iter_wiki_chunks(self, include_images=True, snapshot=False):
+        """
+        逐段生成Wiki内容，供写入文件和拼接字符串复用。表头在调用时立即读取。
+
+        Args:
+            include_images (bool): 为 False 时只输出单元格文本，不生成图片引用和图片文件列表。
+            snapshot (bool): 为 True 时在调用时复制每一行的数据，返回的生成器不再访问表格控件，
+                             可以交给后台线程在用户继续编辑时消费；为 False 时生成器直接读取表格的行，
+                             只能在表格不会被修改期间（同步调用，或UI线程正在等待结果）消费。
+
+        Returns:
+            generator: 依次产生Wiki文本片段。
+        """
+        # 直接使用表格内部数据（sheet.data）中的各行；
+        # get_sheet_data()/yield_sheet_rows() 会对每个单元格调用 get_cell_data，而本程序未使用单元格格式化器，两者结果相同
+        rows = self.sheet.data
+        if snapshot:
+            # 编辑单元格、插入删除列会原地修改各行列表，因此需要复制每一行，而不仅是外层列表
+            rows = [list(row) for row in rows]
+        return self._generate_wiki_chunks(self._header_row(), rows, include_images)
+
+    def _generate_wiki_chunks(self, header_row, rows, include_images):
+        """根据表头行和数据行逐段生成Wiki内容，参数含义见 _iter_wiki_chunks。"""
         # 添加表格标题
-        wiki_content.append("h2. 表格数据\n\n")
+        yield "h2. 表格数据\n\n"
         # 创建表格头
-        headers = self.sheet.headers()
-        header_row = "||" + "||".join(str(h) for h in headers) + "||\n"
-        wiki_content.append(header_row)
-        # 添加数据行
-        data = self.sheet.get_sheet_data()
-        for row_data in data:
-            if any(cell for cell in row_data):  # 只添加非空行
-                row_cells = []
-                for cell_value in row_data:
-                    cell_content = ""
-                    if cell_value:
-                        # 只保留文本内容
-                        clean_text = Utils.clean_text_content(cell_value)
-                        if clean_text:
-                            cell_content = clean_text.replace("\n", "\\\\")
-                        # 处理图片
-                        image_paths = Utils.extract_image_paths(cell_value)
-                        if image_paths:
-                            image_refs = []
-                            for image_path in image_paths:
-                                if os.path.exists(image_path):
-                                    image_name = os.path.basename(image_path)
-                                    image_refs.append(f"!{image_name}!")
-                            if image_refs:
-                                if cell_content:
-                                    cell_content += "|" + "|".join(image_refs)
-                                else:
-                                    cell_content = "|".join(image_refs)
-                    row_cells.append(cell_content)
-                wiki_content.append("|" + "|".join(row_cells) + "|\n")
-        # 添加图片说明
-        wiki_content.append("\nh3. 图片文件\n")
-        wiki_content.append("请将以下图片文件上传到Confluence页面的附件中：\n\n")
-        # 收集所有图片文件
+        yield header_row
+        # 添加数据行；生成图片引用的同时收集所有图片文件，无需再次遍历表格
         image_files = set()
-        for row_data in data:
-            for cell_value in row_data:
+        render_cell = self._make_cell_renderer(include_images)
+        for row_data in rows:
+            # 只添加非空行：查找第一个非空单元格，整行为空时跳过；行首的空单元格直接输出为空，
+            # 从第一个非空单元格开始交给 map 在C层面渲染，每个单元格只被访问一次，无需预先扫描整行
+            for first, cell_value in enumerate(row_data):
                 if cell_value:
-                    image_paths = Utils.extract_image_paths(cell_value)
-                    for image_path in image_paths:
-                        if os.path.exists(image_path):
-                            image_files.add(os.path.basename(image_path))
+                    break
+            else:
+                continue
+            # zip(*) 一次拆分出各单元格文本和图片文件名
+            row_cells, row_image_names = zip(*map(render_cell, row_data[first:]))
+            image_files.update(*row_image_names)
+            yield f"|{'|' * first}{'|'.join(row_cells)}|\n"
+        if not include_images:
+            return
+        # 添加图片说明
+        yield "\nh3. 图片文件\n"
+        yield "请将以下图片文件上传到Confluence页面的附件中：\n\n"
         for image_file in sorted(image_files):
-            wiki_content.append(f"* {image_file}\n")
-        return "".join(wiki_content)
+            yield f"* {image_file}\n"
 
     def copy_wiki_to_clipboard(self):
         """复制Wiki内容到剪贴板。"""
@@ -92,36 +219,3 @@ class WikiExporter:
         except Exception as e:
             messagebox.showerror("错误", f"复制Wiki到剪贴板失败: {str(e)}")
             return ""
-
-    def _export_wiki_sync(self, filename):
-        """同步导出Wiki（用于打包）。"""
-        wiki_content = []
-        
-        # 添加表格标题
-        wiki_content.append("h2. 表格数据\n\n")
-        
-        # 创建表格头
-        headers = self.sheet.headers()
-        header_row = "||" + "||".join(str(h) for h in headers) + "||\n"
-        wiki_content.append(header_row)
-        
-        # 添加数据行
-        data = self.sheet.get_sheet_data()
-        for row_data in data:
-            if any(cell for cell in row_data):
-                row_cells = []
-                for cell_value in row_data:
-                    cell_content = ""
-                    if cell_value:
-                        clean_text = Utils.clean_text_content(cell_value)
-                        if clean_text:
-                            cell_content = clean_text.replace("\n", "\\\\")
-                    row_cells.append(cell_content)
-                
-                wiki_content.append("|" + "|".join(row_cells) + "|\n")
-        
-        # 写入文件
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write("".join(wiki_content))
-
-